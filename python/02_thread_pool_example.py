@@ -1,7 +1,9 @@
 from concurrent.futures import ThreadPoolExecutor
-from utils import cpu_bound_task, timer, io_bound_task, run_examples
+from utils import cpu_bound_task, timer, io_bound_task, run_examples, CheckpointStore
+import os
 import threading
 import time
+import tempfile
 
 @timer
 def thread_pool_without_waiting_for_the_result_without_context_manager():
@@ -110,11 +112,57 @@ def thread_pool_with_cancellation():
         for future in futures:
             future.result()
 
+@timer
+def thread_pool_with_checkpoint_and_resume():
+    print("=== ThreadPool with checkpoint and resume ===")
+    steps = [io_bound_task, io_bound_task, cpu_bound_task, cpu_bound_task, io_bound_task]
+
+    def checkpointed_cancellable_task(thread_number, cancellation_token, checkpoint):
+        run_id = f"Thread {thread_number}"
+        try:
+            completed = checkpoint.load(run_id)  # Resume from the last completed step
+            for step, task in enumerate(steps, start=1):
+                if step in completed:
+                    print(f"Skipping {run_id} -- Task {step} (checkpointed)")
+                    continue
+                if cancellation_token.is_set():
+                    print(f"Cancelled Thread {thread_number}")
+                    return
+                result = task(f"{run_id} -- Task {step}", 1, print_start=False)
+                checkpoint.mark_done(run_id, step, result)
+            checkpoint.clear(run_id)  # All steps done, the next run of this job starts from step 1
+        finally:
+            checkpoint.flush()  # Don't lose the unflushed batch on cancellation
+
+    with tempfile.TemporaryDirectory() as directory:
+        # One store shared by all threads
+        checkpoint = CheckpointStore(os.path.join(directory, "checkpoints.sqlite3"))
+
+        for attempt, cancel_after in enumerate([3, None], start=1):
+            print(f"--- Attempt {attempt} ---")
+            cancellation_token = threading.Event()
+
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                futures = [
+                    executor.submit(checkpointed_cancellable_task, i, cancellation_token, checkpoint)
+                    for i in range(2)
+                ]
+
+                if cancel_after is not None:
+                    time.sleep(cancel_after)
+                    cancellation_token.set()
+
+                for future in futures:
+                    future.result()
+
+        checkpoint.close()
+
 if __name__ == "__main__":
     run_examples(
         # thread_pool_without_waiting_for_the_result,
         # thread_pool_waiting_for_the_result,
         # thread_pool_waiting_for_the_result_when_an_error_occurs,
         # thread_pool_waiting_for_the_result_exception_aggregation,
-        thread_pool_with_cancellation,
+        # thread_pool_with_cancellation,
+        thread_pool_with_checkpoint_and_resume,
     )
\ No newline at end of file
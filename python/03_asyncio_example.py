@@ -1,5 +1,7 @@
+import os
 import asyncio
-from utils import cpu_bound_task, timer, async_io_bound_task, run_examples
+import tempfile
+from utils import cpu_bound_task, timer, async_io_bound_task, run_examples, CheckpointStore
 
 @timer
 def asyncio_without_waiting_for_the_result():
@@ -104,11 +106,80 @@ def asyncio_with_cancellation():
     
     asyncio.run(main())
 
+@timer
+def asyncio_with_checkpoint_and_resume():
+    print("=== Asyncio with checkpoint and resume ===")
+
+    async def step_3(name):
+        await asyncio.sleep(0.00001) # adding checkpoint to check if the task is cancelled
+        return cpu_bound_task(name, 1, print_start=False)
+
+    async def step_4(name):
+        return await asyncio.to_thread(cpu_bound_task, name, 1, print_start=False)
+
+    async def io_step(name):
+        return await async_io_bound_task(name, 1, print_start=False)
+
+    steps = [io_step, io_step, step_3, step_4, io_step]
+
+    # CheckpointStore does blocking SQLite commits, so it runs in a thread to keep the event loop free
+    async def checkpointed_cancellable_task(task_number, checkpoint):
+        run_id = f"Task {task_number}"
+        try:
+            completed = await asyncio.to_thread(checkpoint.load, run_id)  # Resume from the last completed step
+            for step, task in enumerate(steps, start=1):
+                if step in completed:
+                    print(f"Skipping {run_id} -- Step {step} (checkpointed)")
+                    continue
+                if task is step_4:
+                    # The thread can't be cancelled and finishes anyway, shield it and keep its result
+                    thread_step = asyncio.ensure_future(task(f"{run_id} -- Step {step}"))
+                    try:
+                        result = await asyncio.shield(thread_step)
+                    except asyncio.CancelledError:
+                        await asyncio.to_thread(checkpoint.mark_done, run_id, step, await thread_step)
+                        raise
+                else:
+                    result = await task(f"{run_id} -- Step {step}")
+                await asyncio.to_thread(checkpoint.mark_done, run_id, step, result)
+            await asyncio.to_thread(checkpoint.clear, run_id)  # All steps done, the next run of this job starts from step 1
+        except asyncio.CancelledError:
+            print(f"Cancelled Task {task_number}")
+            raise  # Re-raise to properly handle cancellation
+        finally:
+            await asyncio.to_thread(checkpoint.flush)  # Don't lose the unflushed batch on cancellation
+
+    async def main(checkpoint, cancel_after):
+        tasks = [
+            asyncio.create_task(checkpointed_cancellable_task(i, checkpoint))
+            for i in range(2)
+        ]
+
+        if cancel_after is not None:
+            await asyncio.sleep(cancel_after)
+            for task in tasks:
+                task.cancel()
+
+        try:
+            await asyncio.gather(*tasks)
+        except asyncio.CancelledError:
+            print("Tasks were cancelled")
+
+    with tempfile.TemporaryDirectory() as directory:
+        checkpoint = CheckpointStore(os.path.join(directory, "checkpoints.sqlite3"))
+
+        for attempt, cancel_after in enumerate([3, None], start=1):
+            print(f"--- Attempt {attempt} ---")
+            asyncio.run(main(checkpoint, cancel_after))
+
+        checkpoint.close()
+
 if __name__ == "__main__":
     run_examples(
         # asyncio_without_waiting_for_the_result,
         # asyncio_waiting_for_the_result,
         # asyncio_waiting_for_the_result_when_an_error_occurs,
         # asyncio_waiting_for_the_result_exception_aggregation,
-        asyncio_with_cancellation,
+        # asyncio_with_cancellation,
+        asyncio_with_checkpoint_and_resume,
     )
\ No newline at end of file
@@ -1,6 +1,8 @@
 from concurrent.futures import ProcessPoolExecutor
-from utils import timer, cpu_bound_task, run_examples
+from utils import timer, cpu_bound_task, run_examples, submit_serialized, cpu_bound_payload_task, cpu_bound_records_task, CheckpointStore, msgpack
+import os
 import time
+import tempfile
 import multiprocessing
 
 def task_that_might_fail(idx, name, delay):
@@ -40,6 +42,23 @@ def cancellable_task(process_number, shared_dict):
         return
     cpu_bound_task(f"Process {process_number} -- Task 5", 1, print_start=False)
 
+def checkpointed_cancellable_task(process_number, shared_dict, checkpoint):
+    run_id = f"Process {process_number}"
+    try:
+        completed = checkpoint.load(run_id)  # Resume from the last completed step
+        for step in range(1, 6):
+            if step in completed:
+                print(f"Skipping {run_id} -- Task {step} (checkpointed)")
+                continue
+            if shared_dict['should_cancel']:
+                print(f"Cancelled Process {process_number}")
+                return
+            result = cpu_bound_task(f"{run_id} -- Task {step}", 1, print_start=False)
+            checkpoint.mark_done(run_id, step, result)
+        checkpoint.clear(run_id)  # All steps done, the next run of this job starts from step 1
+    finally:
+        checkpoint.close()  # Flushes the unflushed batch, this copy of the store was unpickled for this task
+
 @timer
 def process_pool_without_waiting_for_the_result():
     print("=== ProcessPool without waiting for the result ===")
@@ -109,11 +128,66 @@ def process_pool_with_cancellation():
                 except Exception as e:
                     print(f"Task cancelled or failed: {e}")
 
+@timer
+def process_pool_with_checkpoint_and_resume():
+    print("=== ProcessPool with checkpoint and resume ===")
+    with tempfile.TemporaryDirectory() as directory:
+        checkpoint = CheckpointStore(os.path.join(directory, "checkpoints.sqlite3"))
+
+        with multiprocessing.Manager() as manager:
+            shared_dict = manager.dict()
+
+            for attempt, cancel_after in enumerate([3, None], start=1):
+                print(f"--- Attempt {attempt} ---")
+                shared_dict['should_cancel'] = False
+
+                with ProcessPoolExecutor(max_workers=2) as executor:
+                    futures = [
+                        executor.submit(checkpointed_cancellable_task, i, shared_dict, checkpoint)
+                        for i in range(2)
+                    ]
+
+                    if cancel_after is not None:
+                        time.sleep(cancel_after)
+                        print("Cancelling tasks...")
+                        shared_dict['should_cancel'] = True
+
+                    for future in futures:
+                        future.result()
+
+        checkpoint.close()
+
+@timer
+def process_pool_with_serializers():
+    print("=== ProcessPool with serializers ===")
+    payload = bytes(64 * 1024 * 1024)  # Large payload, this is where process pools lose to threads
+    records = [{"id": i, "value": i * 2} for i in range(10000)]  # Plain records
+
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        executor.submit(cpu_bound_task, "Warm up", 0).result()  # Don't count worker startup in the first round trip
+
+        for serializer in ("pickle", "pickle5"):
+            future = submit_serialized(executor, serializer, cpu_bound_payload_task, f"Payload with {serializer}", payload)
+            result, stats = future.result()
+            print(f"Result: {result}")
+            print(f"Stats: {stats}")
+
+        for serializer in ("pickle", "compact"):
+            if serializer == "compact" and msgpack is None:
+                print("Skipping compact, msgpack is not installed")
+                continue
+            future = submit_serialized(executor, serializer, cpu_bound_records_task, f"Records with {serializer}", records)
+            result, stats = future.result()
+            print(f"Result: {result}")
+            print(f"Stats: {stats}")
+
 if __name__ == "__main__":
     run_examples(
         # process_pool_without_waiting_for_the_result,
         # process_pool_waiting_for_the_result,
         # process_pool_waiting_for_the_result_when_an_error_occurs,
         # process_pool_waiting_for_the_result_exception_aggregation,
-        process_pool_with_cancellation
+        # process_pool_with_cancellation,
+        # process_pool_with_serializers,
+        process_pool_with_checkpoint_and_resume,
     )
\ No newline at end of file
@@ -1,6 +1,6 @@
 import asyncio
 from concurrent.futures import ProcessPoolExecutor
-from utils import cpu_bound_task, timer, async_io_bound_task, run_examples, io_bound_task
+from utils import cpu_bound_task, timer, async_io_bound_task, run_examples, io_bound_task, run_in_executor_serialized, cpu_bound_payload_task
 
 @timer
 def asyncio_convert_blocking_to_non_blocking_when_working_with_legacy_library():
@@ -24,8 +24,24 @@ def asyncio_with_processes():
                 print(f"Process result: {result}")
     asyncio.run(main())
 
+@timer
+def asyncio_with_processes_and_serializers():
+    print("=== Asyncio with processes and serializers ===")
+    async def main():
+        payload = bytes(64 * 1024 * 1024)
+        with ProcessPoolExecutor() as pool:
+            results = await asyncio.gather(
+                run_in_executor_serialized(pool, "pickle", cpu_bound_payload_task, "Payload with pickle", payload),
+                run_in_executor_serialized(pool, "pickle5", cpu_bound_payload_task, "Payload with pickle5", payload)
+            )
+            for result, stats in results:
+                print(f"Process result: {result}")
+                print(f"Stats: {stats}")
+    asyncio.run(main())
+
 if __name__ == "__main__":
     run_examples(
         # asyncio_convert_blocking_to_non_blocking_when_working_with_legacy_library,
-        asyncio_with_processes,
+        # asyncio_with_processes,
+        asyncio_with_processes_and_serializers,
     )
\ No newline at end of file
@@ -1,8 +1,21 @@
+import os
+import sys
 import time
+import pickle
+import sqlite3
 import asyncio
+import threading
+from concurrent.futures import Executor, Future
+from dataclasses import dataclass
 from functools import wraps
+from multiprocessing import resource_tracker, shared_memory
 from typing import Any, Callable
 
+try:
+    import msgpack
+except ImportError:  # Optional, only needed by the "compact" serializer
+    msgpack = None
+
 def timer(func: Callable) -> Callable:
     @wraps(func)
     def wrapper(*args: Any, **kwargs: Any) -> Any:
@@ -65,4 +78,350 @@ def run_examples(*funcs: Callable) -> None:
     for i, func in enumerate(funcs):
         if i > 0:
             print("\n")  # Add newline between functions
-        func()
\ No newline at end of file
+        func()
+
+# --- Serialization-cost-aware IPC for process pools ---
+#
+# Everything submitted to a ProcessPoolExecutor is pickled in the parent, written
+# through a pipe, and unpickled in the worker (and the same again for the result).
+# For large payloads that round trip is what makes process pools lose to threads.
+#
+# Serializers:
+#   - "pickle":  plain executor.submit, the default path everything else is compared with.
+#                The executor pickles internally, so only the round trip is measured
+#   - "pickle5": pickle protocol 5, large bytes/bytearray args (and anything that
+#                already exposes PickleBuffer, e.g. numpy arrays) are sent out-of-band
+#                through shared memory instead of the pipe. Only args go out-of-band,
+#                the result is pickled in-band and comes back through the pipe. That skips the pipe, not the
+#                copies: the parent copies each buffer into shared memory and the worker
+#                copies it back out (so func gets real bytes/bytearray and the segment can
+#                be closed right away), which shows up in deserialize_seconds
+#   - "compact": msgpack (pip install msgpack), only for plain records (dict, list, str,
+#                bytes, int, float, bool, None). Tuples come back as lists and dict keys
+#                must be str or bytes, int keys are rejected when loading
+#
+# "pickle5" and "compact" pre-serialize to bytes, which the executor then pickles once
+# more into its own message. That envelope (a copy of the payload, small for "pickle5"
+# since large buffers are out-of-band) is only counted in round_trip_seconds.
+
+# Top-level bytes/bytearray args (and kwargs) at least this big go out-of-band. Bytes nested
+# inside a list or dict arg stay in-band, wrap them in pickle.PickleBuffer to send them out.
+OUT_OF_BAND_THRESHOLD = 64 * 1024
+
+SERIALIZERS = ("pickle", "pickle5", "compact")
+
+@dataclass
+class SerializationStats:
+    # None means not measured ("pickle" leaves serialization to the executor)
+    serializer: str
+    serialize_seconds: float | None = None    # args in the parent + result in the worker
+    deserialize_seconds: float | None = None  # args in the worker (incl. copying out of shared memory) + result in the parent
+    bytes_sent: int | None = None             # args payload, including out-of-band buffers
+    bytes_received: int | None = None         # result payload (always in-band)
+    out_of_band_bytes: int | None = None      # part of bytes_sent that went through shared memory
+    round_trip_seconds: float = 0.0           # submit to decoded result, includes the pipe transfer
+
+    def __str__(self) -> str:
+        parts = []
+        if self.serialize_seconds is not None:
+            parts.append(f"serialize {self.serialize_seconds * 1000:.2f} ms")
+        if self.deserialize_seconds is not None:
+            parts.append(f"deserialize {self.deserialize_seconds * 1000:.2f} ms")
+        if self.bytes_sent is not None:
+            parts.append(f"sent {self.bytes_sent} bytes ({self.out_of_band_bytes} out-of-band)")
+        if self.bytes_received is not None:
+            parts.append(f"received {self.bytes_received} bytes")
+        parts.append(f"round trip {self.round_trip_seconds * 1000:.2f} ms")
+        return f"{self.serializer}: " + ", ".join(parts)
+
+def serialize(obj: Any, serializer: str, out_of_band: bool = True) -> tuple[bytes, list[pickle.PickleBuffer]]:
+    """Serialize obj, returning the payload and its out-of-band buffers."""
+    if serializer == "pickle":
+        return pickle.dumps(obj), []
+    if serializer == "pickle5":
+        buffers = []
+        payload = pickle.dumps(obj, protocol=5, buffer_callback=buffers.append if out_of_band else None)
+        return payload, buffers
+    if serializer == "compact":
+        _require_msgpack()
+        return msgpack.packb(obj), []
+    raise ValueError(f"Unknown serializer: {serializer}")
+
+def deserialize(payload: bytes, buffers: list, serializer: str) -> Any:
+    if serializer == "pickle":
+        return pickle.loads(payload)
+    if serializer == "pickle5":
+        return pickle.loads(payload, buffers=buffers)
+    if serializer == "compact":
+        _require_msgpack()
+        return msgpack.unpackb(payload)
+    raise ValueError(f"Unknown serializer: {serializer}")
+
+def _require_msgpack() -> None:
+    if msgpack is None:
+        raise ImportError('The "compact" serializer needs msgpack, install it with: pip install msgpack')
+
+def _out_of_band(value: Any) -> Any:
+    # bytes/bytearray are always pickled in-band, wrapping them in PickleBuffer moves them out
+    if isinstance(value, (bytes, bytearray)) and len(value) >= OUT_OF_BAND_THRESHOLD:
+        return pickle.PickleBuffer(value)
+    return value
+
+def _to_loadable(raw: memoryview, readonly: bool) -> Any:
+    # Copies the buffer: read-only buffers come back as bytes, writable ones as bytearray
+    # (same as the original), and the shared memory can be closed right after loading
+    return raw.tobytes() if readonly else bytearray(raw)
+
+def _tracker_name(shm: shared_memory.SharedMemory) -> str:
+    # The resource tracker only tracks POSIX shared memory, under the name with its leading slash
+    return f"/{shm.name}"
+
+def _attach_shared_memory(name: str) -> shared_memory.SharedMemory:
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    # Before 3.13 attaching also registers the segment with the resource tracker, which then
+    # "cleans up" the parent's segment when the worker exits (https://github.com/python/cpython/issues/82300).
+    # The worker only attaches, the parent owns the segment, see _release().
+    shm = shared_memory.SharedMemory(name=name)
+    resource_tracker.unregister(_tracker_name(shm), "shared_memory")
+    return shm
+
+def _run_serialized(serializer: str, func: Callable, payload: bytes, buffer_refs: list) -> tuple:
+    """Worker side: load args (out-of-band buffers from shared memory), run func, dump result in-band."""
+    start = time.perf_counter()
+    buffers = []
+    for name, size, readonly in buffer_refs:
+        shm = _attach_shared_memory(name)
+        try:
+            buffers.append(_to_loadable(shm.buf[:size], readonly))
+        finally:
+            shm.close()
+    args, kwargs = deserialize(payload, buffers, serializer)
+    deserialize_seconds = time.perf_counter() - start
+
+    result = func(*args, **kwargs)
+
+    start = time.perf_counter()
+    # The result goes back in-band through the pipe, the parent owns every shared memory segment
+    result_payload, _ = serialize(result, serializer, out_of_band=False)
+    serialize_seconds = time.perf_counter() - start
+    return result_payload, deserialize_seconds, serialize_seconds
+
+class _SerializedFuture(Future):
+    """Future returned by submit_serialized, decodes the result of the worker task (inner)."""
+
+    def __init__(self, inner: Future):
+        super().__init__()
+        self._inner = inner
+
+    def cancel(self) -> bool:
+        # Same as executor.submit(...).cancel(): only succeeds if the worker task hasn't started
+        if not self._inner.cancel():
+            return False
+        return super().cancel()
+
+def submit_serialized(executor: Executor, serializer: str, func: Callable, *args: Any, **kwargs: Any) -> Future:
+    """Like executor.submit(func, *args, **kwargs), but with a pluggable serializer.
+
+    The returned future resolves to (result, SerializationStats).
+    func must be importable by the worker (a module-level function), same as with submit().
+    """
+    if serializer not in SERIALIZERS:
+        raise ValueError(f"Unknown serializer: {serializer}, expected one of {SERIALIZERS}")
+    stats = SerializationStats(serializer)
+
+    submitted = start = time.perf_counter()
+    if serializer == "pickle":
+        inner = executor.submit(func, *args, **kwargs)
+        outer = _SerializedFuture(inner)
+
+        def on_plain_done(inner: Future) -> None:
+            if inner.cancelled():
+                outer.cancel()
+                return
+            outer.set_running_or_notify_cancel()  # Can't be cancelled anymore, inner already ran
+            try:
+                result = inner.result()
+            except BaseException as e:
+                outer.set_exception(e)
+                return
+            stats.round_trip_seconds = time.perf_counter() - submitted
+            outer.set_result((result, stats))
+
+        inner.add_done_callback(on_plain_done)
+        return outer
+
+    if serializer == "pickle5":
+        args = tuple(_out_of_band(arg) for arg in args)
+        kwargs = {key: _out_of_band(value) for key, value in kwargs.items()}
+    payload, buffers = serialize((args, kwargs), serializer)
+
+    segments = []
+    buffer_refs = []
+    try:
+        for buf in buffers:
+            raw = buf.raw()
+            shm = shared_memory.SharedMemory(create=True, size=max(raw.nbytes, 1))
+            shm.buf[:raw.nbytes] = raw
+            segments.append(shm)
+            buffer_refs.append((shm.name, raw.nbytes, raw.readonly))
+        stats.serialize_seconds = time.perf_counter() - start
+        stats.out_of_band_bytes = sum(size for _, size, _ in buffer_refs)
+        stats.bytes_sent = len(payload) + stats.out_of_band_bytes
+
+        inner = executor.submit(_run_serialized, serializer, func, payload, buffer_refs)
+    except BaseException:
+        _release(segments)
+        raise
+
+    outer = _SerializedFuture(inner)
+
+    def on_done(inner: Future) -> None:
+        _release(segments)  # The worker is done with the segments
+        if inner.cancelled():
+            outer.cancel()
+            return
+        outer.set_running_or_notify_cancel()  # Can't be cancelled anymore, inner already ran
+        try:
+            result_payload, worker_deserialize, worker_serialize = inner.result()
+        except BaseException as e:
+            outer.set_exception(e)
+            return
+        start = time.perf_counter()
+        try:
+            result = deserialize(result_payload, [], serializer)
+        except BaseException as e:
+            outer.set_exception(e)
+            return
+        stats.deserialize_seconds = worker_deserialize + time.perf_counter() - start
+        stats.serialize_seconds += worker_serialize
+        stats.bytes_received = len(result_payload)
+        stats.round_trip_seconds = time.perf_counter() - submitted
+        outer.set_result((result, stats))
+
+    inner.add_done_callback(on_done)
+    return outer
+
+async def run_in_executor_serialized(pool: Executor, serializer: str, func: Callable, *args: Any) -> tuple[Any, SerializationStats]:
+    """Like loop.run_in_executor(pool, func, *args), but with a pluggable serializer."""
+    return await asyncio.wrap_future(submit_serialized(pool, serializer, func, *args))
+
+def _release(segments: list[shared_memory.SharedMemory]) -> None:
+    for shm in segments:
+        shm.close()
+        # If the worker shares our resource tracker its unregister also dropped our registration,
+        # register again so unlink() has one to remove (registering twice is a no-op)
+        resource_tracker.register(_tracker_name(shm), "shared_memory")
+        shm.unlink()
+
+def cpu_bound_payload_task(name: str, payload: bytes, print_start: bool = True, print_finish: bool = True) -> dict:
+    if print_start:
+        print(f"Starting {name}")
+    checksum = sum(payload[::4096])
+    if print_finish:
+        print(f"Finished {name}")
+    return {"name": name, "size": len(payload), "checksum": checksum}
+
+def cpu_bound_records_task(name: str, records: list, print_start: bool = True, print_finish: bool = True) -> dict:
+    if print_start:
+        print(f"Starting {name}")
+    total = sum(record["value"] for record in records)
+    if print_finish:
+        print(f"Finished {name}")
+    return {"name": name, "count": len(records), "total": total}
+
+# --- Durable checkpoint/resume for multi-step tasks ---
+
+class CheckpointStore:
+    """Per-step checkpoints in a local SQLite file.
+
+    A cancelled or killed run resumes from the last completed step instead of step 1.
+    Writes are batched: mark_done() only commits every flush_every steps or flush_interval
+    seconds, so checkpointing doesn't dominate short steps. A crash loses at most the
+    unflushed batch, call flush() when a run is cancelled or finishes.
+
+    Can be shared between threads and asyncio tasks (one connection guarded by a lock)
+    and passed to worker processes. Only the path and settings are pickled, so every
+    unpickled copy (e.g. one per executor.submit) opens its own connection on first use,
+    close() it when the task is done.
+    """
+
+    def __init__(self, path: str, flush_every: int = 10, flush_interval: float = 1.0):
+        self.path = path
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._pending = []
+        self._last_flush = time.perf_counter()
+        self._connection = None
+        self._pid = None
+
+    def __getstate__(self) -> dict:
+        # Connections, locks and unflushed steps stay in the process that owns them
+        return {"path": self.path, "flush_every": self.flush_every, "flush_interval": self.flush_interval}
+
+    def __setstate__(self, state: dict) -> None:
+        self.__init__(**state)
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None or self._pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")  # Processes can write while others read
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS checkpoints ("
+                "run_id TEXT NOT NULL, step INTEGER NOT NULL, result BLOB, "
+                "PRIMARY KEY (run_id, step))"
+            )
+            connection.commit()
+            self._connection = connection
+            self._pid = os.getpid()
+            self._pending = []  # Unflushed steps inherited through fork belong to the parent
+        return self._connection
+
+    def load(self, run_id: str) -> dict[int, Any]:
+        """Return {step: result} for every completed step of run_id."""
+        self.flush()
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT step, result FROM checkpoints WHERE run_id = ?", (run_id,)
+            ).fetchall()
+        return {step: pickle.loads(result) for step, result in rows}
+
+    def mark_done(self, run_id: str, step: int, result: Any = None) -> None:
+        with self._lock:
+            self._connect()
+            self._pending.append((run_id, step, pickle.dumps(result)))
+            should_flush = (
+                len(self._pending) >= self.flush_every
+                or time.perf_counter() - self._last_flush >= self.flush_interval
+            )
+        if should_flush:
+            self.flush()
+
+    def flush(self) -> None:
+        with self._lock:
+            connection = self._connect()
+            if self._pending:
+                connection.executemany(
+                    "INSERT OR REPLACE INTO checkpoints (run_id, step, result) VALUES (?, ?, ?)",
+                    self._pending,
+                )
+                connection.commit()
+                self._pending = []
+            self._last_flush = time.perf_counter()
+
+    def clear(self, run_id: str) -> None:
+        """Forget run_id, e.g. once the whole run has completed."""
+        with self._lock:
+            connection = self._connect()
+            self._pending = [entry for entry in self._pending if entry[0] != run_id]
+            connection.execute("DELETE FROM checkpoints WHERE run_id = ?", (run_id,))
+            connection.commit()
+
+    def close(self) -> None:
+        if self._connection is not None or self._pending:  # Don't create the database just to close it
+            self.flush()
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None